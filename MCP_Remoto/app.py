@@ -1,15 +1,32 @@
 # app.py
 from flask import Flask, request, jsonify
 import json
+import os
+import stat
+import tempfile
+import threading
+from urllib.parse import quote
 import pandas as pd
 
 app = Flask(__name__)
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Cargar spec.json
-with open("spec.json", "r", encoding="utf-8") as f:
+with open(os.path.join(BASE_DIR, "spec.json"), "r", encoding="utf-8") as f:
     spec = json.load(f)
 
+# usuarios.csv es la lista de usuarios con su saldo inicial y no se
+# reescribe; el saldo vigente de cada usuario vive en su propio archivo
+# dentro de BALANCES_DIR, así un pago solo reescribe el saldo de su usuario.
 CSV_FILE = "usuarios.csv"
+BALANCES_DIR = "saldos"
+
+# Un lock por usuario existente: pagos de usuarios distintos corren en
+# paralelo y los del mismo usuario se serializan. Solo coordina hilos de un
+# mismo proceso.
+_user_locks = {}
+_user_locks_guard = threading.Lock()
 
 @app.route("/initialize", methods=["POST"])
 def initialize():
@@ -40,13 +57,11 @@ def get_pending_balance(params):
     if not name:
         return error_response("Missing 'name' parameter", code=400)
 
-    df = pd.read_csv(CSV_FILE)
-    user_row = df[df['nombre'] == name]
-
-    if user_row.empty:
+    users = _load_users()
+    if name not in users:
         return error_response(f"Usuario '{name}' no encontrado.", code=404)
 
-    saldo = float(user_row.iloc[0]['saldo_pendiente'])
+    saldo = _read_balance(name, users[name])
     return jsonify({"output": f"Saldo pendiente de {name}: Q{saldo}"})
 
 def register_payment(params):
@@ -56,22 +71,69 @@ def register_payment(params):
     if not name or amount is None:
         return error_response("Missing 'name' or 'amount' parameter", code=400)
 
-    df = pd.read_csv(CSV_FILE)
-    idx = df.index[df['nombre'] == name]
-
-    if idx.empty:
+    users = _load_users()
+    if name not in users:
         return error_response(f"Usuario '{name}' no encontrado.", code=404)
 
-    current_balance = float(df.loc[idx[0], 'saldo_pendiente'])
-    new_balance = max(current_balance - float(amount), 0.0)
-
-    df.loc[idx[0], 'saldo_pendiente'] = new_balance
-    df.to_csv(CSV_FILE, index=False)
+    with _get_user_lock(name):
+        current_balance = _read_balance(name, users[name])
+        new_balance = max(current_balance - float(amount), 0.0)
+        _write_balance(name, new_balance)
 
     return jsonify({
         "output": f"Pago de Q{amount} registrado para {name}. Nuevo saldo: Q{new_balance}"
     })
 
+def _load_users():
+    """Devuelve {nombre: saldo inicial} según usuarios.csv."""
+    df = pd.read_csv(CSV_FILE)
+    return dict(zip(df['nombre'], df['saldo_pendiente'].astype(float)))
+
+def _get_user_lock(name):
+    # Solo se llama con usuarios existentes, así el dict no crece sin límite.
+    with _user_locks_guard:
+        return _user_locks.setdefault(name, threading.Lock())
+
+def _balance_path(name):
+    return os.path.join(BALANCES_DIR, quote(name, safe="") + ".saldo")
+
+def _read_balance(name, initial_balance):
+    try:
+        with open(_balance_path(name), "r", encoding="utf-8") as f:
+            return float(f.read())
+    except FileNotFoundError:
+        return initial_balance
+
+def _write_balance(name, balance):
+    """Escribe el saldo a un archivo temporal y lo reemplaza con os.replace."""
+    os.makedirs(BALANCES_DIR, exist_ok=True)
+    path = _balance_path(name)
+    # mkstemp crea el archivo con modo 0600; conservar el modo del archivo
+    # del usuario o, si aún no existe, el de usuarios.csv.
+    mode_source = path if os.path.exists(path) else CSV_FILE
+    mode = stat.S_IMODE(os.stat(mode_source).st_mode)
+
+    fd, tmp_path = tempfile.mkstemp(dir=BALANCES_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            os.fchmod(f.fileno(), mode)
+            f.write(repr(balance))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(BALANCES_DIR)
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
 def error_response(message, code=500):
     return jsonify({
         "error": {
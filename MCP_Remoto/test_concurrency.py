@@ -0,0 +1,127 @@
+# test_concurrency.py
+# Pruebas de concurrencia para register_payment.
+import os
+import stat
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import app as mcp_app  # noqa: E402
+
+USERS = ["Ana", "Beto", "Carla", "Diego"]
+INITIAL_BALANCE = 10000.0
+PAYMENTS_PER_USER = 50
+AMOUNT = 1.0
+
+@contextmanager
+def temp_store(users, balance):
+    """Apunta la app a un usuarios.csv y un directorio de saldos temporales."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "usuarios.csv")
+        balances_dir = os.path.join(tmp, "saldos")
+        pd.DataFrame({
+            "nombre": users,
+            "saldo_pendiente": [balance] * len(users),
+        }).to_csv(csv_path, index=False)
+
+        original = (mcp_app.CSV_FILE, mcp_app.BALANCES_DIR)
+        mcp_app.CSV_FILE, mcp_app.BALANCES_DIR = csv_path, balances_dir
+        try:
+            yield csv_path, balances_dir
+        finally:
+            mcp_app.CSV_FILE, mcp_app.BALANCES_DIR = original
+
+def pay(client, name, amount):
+    return client.post("/run", json={
+        "tool_name": "register_payment",
+        "input": {"name": name, "amount": amount},
+    })
+
+def test_concurrent_payments_no_lost_updates():
+    with temp_store(USERS, INITIAL_BALANCE) as (_, balances_dir):
+        client = mcp_app.app.test_client()
+        statuses = []
+        statuses_lock = threading.Lock()
+
+        def worker(name):
+            resp = pay(client, name, AMOUNT)
+            with statuses_lock:
+                statuses.append(resp.status_code)
+
+        threads = [
+            threading.Thread(target=worker, args=(name,))
+            for _ in range(PAYMENTS_PER_USER)
+            for name in USERS
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert statuses.count(200) == len(threads), statuses
+
+        expected = INITIAL_BALANCE - PAYMENTS_PER_USER * AMOUNT
+        for name in USERS:
+            resp = client.post("/run", json={
+                "tool_name": "get_pending_balance",
+                "input": {"name": name},
+            })
+            assert resp.get_json()["output"] == f"Saldo pendiente de {name}: Q{expected}"
+
+        leftovers = [f for f in os.listdir(balances_dir) if f.endswith(".tmp")]
+        assert not leftovers, leftovers
+
+def test_payments_for_other_users_are_not_blocked():
+    with temp_store(["Ana", "Beto"], 100.0):
+        client = mcp_app.app.test_client()
+        results = {}
+
+        def worker(name):
+            results[name] = pay(client, name, 10).status_code
+
+        with mcp_app._get_user_lock("Ana"):
+            ana = threading.Thread(target=worker, args=("Ana",))
+            beto = threading.Thread(target=worker, args=("Beto",))
+            ana.start()
+            beto.start()
+
+            beto.join(timeout=5)
+            assert not beto.is_alive()
+            assert results["Beto"] == 200
+
+            ana.join(timeout=0.2)
+            assert ana.is_alive()
+
+        ana.join(timeout=5)
+        assert results["Ana"] == 200
+
+def test_unknown_user_does_not_create_lock():
+    with temp_store(["Ana"], 100.0):
+        resp = pay(mcp_app.app.test_client(), "NoExiste", 10)
+        assert resp.status_code == 404
+        assert "NoExiste" not in mcp_app._user_locks
+
+def test_payment_preserves_file_mode():
+    with temp_store(["Ana"], 100.0) as (csv_path, balances_dir):
+        os.chmod(csv_path, 0o644)
+        client = mcp_app.app.test_client()
+
+        assert pay(client, "Ana", 10).status_code == 200
+        balance_file = mcp_app._balance_path("Ana")
+        assert stat.S_IMODE(os.stat(balance_file).st_mode) == 0o644
+
+        os.chmod(balance_file, 0o640)
+        assert pay(client, "Ana", 10).status_code == 200
+        assert stat.S_IMODE(os.stat(balance_file).st_mode) == 0o640
+
+if __name__ == "__main__":
+    test_concurrent_payments_no_lost_updates()
+    test_payments_for_other_users_are_not_blocked()
+    test_unknown_user_does_not_create_lock()
+    test_payment_preserves_file_mode()